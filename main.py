@@ -1,12 +1,19 @@
 from fastapi import FastAPI, HTTPException, Query
-from pydantic import BaseModel, Field, conint
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, conint, constr
 import duckdb
-import requests
+import pyarrow as pa
+import pyarrow.compute as pc
+import httpx
+from cachetools import TTLCache
+import asyncio
 import os
+import threading
 from dotenv import load_dotenv
-from typing import List, Optional, Annotated
-from apscheduler.schedulers.background import BackgroundScheduler
+from typing import Dict, List, Optional, Annotated
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from datetime import datetime
+from functools import lru_cache
 import logging
 
 # Load environment variables from .env file
@@ -17,19 +24,28 @@ if not AIRLABS_API_KEY:
     raise Exception("Airlabs API key not found. Please set AIRLABS_API_KEY in your environment.")
 
 # Initialize FastAPI app
-app = FastAPI(title="Flight Delay API")
+app = FastAPI(title="Flight Delay API", default_response_class=ORJSONResponse)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Shared async HTTP client so connections to Airlabs are kept alive and reused
+http_client = httpx.AsyncClient(limits=httpx.Limits(max_keepalive_connections=20), timeout=10)
+
+# Filters fetched within the last minute; Airlabs data changes slowly, so repeats are skipped
+RECENT_FETCHES = TTLCache(maxsize=256, ttl=60)
+
+# Three-letter uppercase IATA airport code, shared by the models and query parameters
+IATACode = constr(pattern=r'^[A-Z]{3}$')
+
 # Define the data model using Pydantic
 class DelayRecord(BaseModel):
     airline_iata: str
     flight_iata: str
-    dep_iata: Annotated[str, Field(min_length=3, max_length=3, pattern="^[A-Z]{3}$")]
+    dep_iata: IATACode
     dep_icao: Optional[str]
-    arr_iata: Annotated[str, Field(min_length=3, max_length=3, pattern="^[A-Z]{3}$")]
+    arr_iata: IATACode
     arr_icao: Optional[str]
     delayed: conint(ge=0)
     flight_type: str  # 'arrivals' or 'departures'
@@ -42,12 +58,28 @@ class DelaySummary(BaseModel):
     average_delay: float
     total_flights: int
 
+# Arrow schema matching the delays table, used to hand batches to DuckDB
+DELAYS_SCHEMA = pa.schema([
+    ('airline_iata', pa.string()),
+    ('flight_iata', pa.string()),
+    ('dep_iata', pa.string()),
+    ('dep_icao', pa.string()),
+    ('arr_iata', pa.string()),
+    ('arr_icao', pa.string()),
+    ('delayed', pa.int32()),
+    ('flight_type', pa.string()),
+    ('dep_time', pa.timestamp('us')),
+    ('arr_time', pa.timestamp('us'))
+])
+
+# Airlabs delays API endpoint
+AIRLABS_DELAYS_URL = 'https://airlabs.co/api/v9/delays'
+
 # Connect to DuckDB (persistent storage)
 conn = duckdb.connect('flight_delays.db')
-cursor = conn.cursor()
 
 # Create the delays table with primary key to prevent duplicates
-cursor.execute('''
+conn.execute('''
 CREATE TABLE IF NOT EXISTS delays (
     airline_iata VARCHAR,
     flight_iata VARCHAR,
@@ -63,183 +95,420 @@ CREATE TABLE IF NOT EXISTS delays (
 )
 ''')
 
-def fetch_delays_task(
+# No secondary indexes on delays: DuckDB cannot ON CONFLICT DO UPDATE columns
+# that are part of an index (dep_iata, arr_iata, arr_time would be), and its
+# ART indexes only serve point lookups. Airport/time lookups for /summary go
+# through delays_rollup, whose primary key covers (airport, direction, hour).
+
+# Hourly per-airport roll-up of delays, used by /summary instead of scanning delays
+conn.execute('''
+CREATE TABLE IF NOT EXISTS delays_rollup (
+    airport_code VARCHAR,
+    direction VARCHAR,  -- 'arrivals' or 'departures'
+    bucket_hour TIMESTAMP,
+    sum_delay BIGINT,
+    cnt BIGINT,
+    PRIMARY KEY (airport_code, direction, bucket_hour)
+)
+''')
+
+# Adds (sign='') or retracts (sign='-') the roll-up contribution of a set of delay rows
+ROLLUP_DELTA_SQL = '''
+    INSERT INTO delays_rollup
+    SELECT airport_code, direction, bucket_hour, {sign}SUM(delayed), {sign}COUNT(*)
+    FROM (
+        SELECT dep_iata AS airport_code, 'departures' AS direction,
+               date_trunc('hour', dep_time) AS bucket_hour, delayed
+        FROM {rows}
+        UNION ALL
+        SELECT arr_iata, 'arrivals', date_trunc('hour', arr_time), delayed
+        FROM {rows}
+    )
+    WHERE airport_code IS NOT NULL
+    GROUP BY ALL
+    ON CONFLICT (airport_code, direction, bucket_hour) DO UPDATE SET
+        sum_delay = sum_delay + excluded.sum_delay,
+        cnt = cnt + excluded.cnt
+'''
+
+# Existing delays rows that the staged batch is about to replace
+REPLACED_ROWS = '''(
+    SELECT * FROM delays d
+    WHERE EXISTS (
+        SELECT 1 FROM delays_stage s
+        WHERE s.flight_iata = d.flight_iata
+          AND s.dep_time = d.dep_time
+          AND s.flight_type = d.flight_type
+    )
+)'''
+
+# Rebuild the roll-up on startup so it matches the rows already in delays
+conn.execute('DELETE FROM delays_rollup')
+conn.execute(ROLLUP_DELTA_SQL.format(sign='', rows='delays'))
+
+# Airport and time columns of delays summarized for each direction
+SUMMARY_COLUMNS = {
+    'departures': ('dep_iata', 'dep_time'),
+    'arrivals': ('arr_iata', 'arr_time')
+}
+
+def build_delays_params(
     flight_type: str,
     min_delayed_time: int,
     arrival_airport_code: Optional[str] = None,
     departure_airport_code: Optional[str] = None
-):
+) -> dict:
+    """
+    Build the Airlabs delays API query parameters for the specified filters.
     """
-    Scheduled task to fetch delay information from the Airlabs API with specified filters.
+    params = {
+        'api_key': AIRLABS_API_KEY,
+        'delay': min_delayed_time,
+        'type': flight_type
+    }
+
+    # Add airport code filters if provided
+    if arrival_airport_code:
+        params['arr_iata'] = arrival_airport_code
+    if departure_airport_code:
+        params['dep_iata'] = departure_airport_code
+
+    return params
+
+def coerce_delayed(values: list) -> pa.Array:
+    """
+    Cast raw 'delayed' values to int32, treating missing or non-numeric values as 0.
     """
     try:
-        # Define the API endpoint and parameters
-        url = 'https://airlabs.co/api/v9/delays'
-        params = {
-            'api_key': AIRLABS_API_KEY,
-            'delay': min_delayed_time,
-            'type': flight_type
-        }
-
-        # Add airport code filters if provided
-        if arrival_airport_code:
-            params['arr_iata'] = arrival_airport_code.upper()
-        if departure_airport_code:
-            params['dep_iata'] = departure_airport_code.upper()
-
-        # Make the API request
-        response = requests.get(url, params=params)
-        data = response.json()
-
-        if data.get('error'):
-            logger.error(f"Error fetching data: {data['error']['message']}")
-            return
-
-        # Extract the delays data
-        delays = data.get('response', [])
-        if not delays:
-            logger.info("No delay data available with the specified filters.")
-            return
-
-        # Prepare data for insertion
-        records = []
-        for item in delays:
-            # Parse times
-            dep_time_utc = item.get('dep_time_utc')
-            arr_time_utc = item.get('arr_time_utc')
-
-            # Skip if times are missing
-            if not dep_time_utc or not arr_time_utc:
-                continue
-
-            # Convert times to datetime objects
+        raw = pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Mixed numbers and strings; fall back to comparing them as text
+        raw = pa.array([None if value is None else str(value) for value in values], type=pa.string())
+
+    if pa.types.is_string(raw.type):
+        # Accept what int() would, limited to ASCII integers that fit in int32
+        raw = pc.utf8_trim_whitespace(raw)
+        raw = pc.if_else(pc.match_substring_regex(raw, r'^-?[0-9]{1,9}$'), raw, '0')
+    return pc.cast(raw, pa.int32(), safe=False).fill_null(0)
+
+def parse_delays(response: httpx.Response, flight_type: str, min_delayed_time: int) -> Optional[pa.Table]:
+    """
+    Decode an Airlabs delays API response into an Arrow batch matching the delays table.
+    """
+    data = response.json()
+    if data.get('error'):
+        # Raised rather than returned so callers neither store nor cache the failed fetch
+        raise Exception(f"Error fetching data: {data['error']['message']}")
+
+    # Extract the delays data
+    delays = data.get('response', [])
+    if not delays:
+        logger.info("No delay data available with the specified filters.")
+        return None
+
+    # Prepare data for insertion as parallel column lists
+    airline_iata_col, flight_iata_col = [], []
+    dep_iata_col, dep_icao_col = [], []
+    arr_iata_col, arr_icao_col = [], []
+    delayed_col, dep_time_col, arr_time_col = [], [], []
+    for item in delays:
+        airline_iata_col.append(item.get('airline_iata', ''))
+        flight_iata_col.append(item.get('flight_iata', ''))
+        dep_iata_col.append(item.get('dep_iata', ''))
+        dep_icao_col.append(item.get('dep_icao', ''))
+        arr_iata_col.append(item.get('arr_iata', ''))
+        arr_icao_col.append(item.get('arr_icao', ''))
+        delayed_col.append(item.get('delayed'))
+        dep_time_col.append(item.get('dep_time_utc'))
+        arr_time_col.append(item.get('arr_time_utc'))
+
+    # Coerce the 'delayed' values in one vectorized cast
+    delayed_arr = coerce_delayed(delayed_col)
+
+    # Parse the time columns in one vectorized pass; missing or invalid values become null
+    dep_time_raw = pa.array(dep_time_col, type=pa.string())
+    arr_time_raw = pa.array(arr_time_col, type=pa.string())
+    dep_time_arr = pc.strptime(dep_time_raw, format='%Y-%m-%d %H:%M', unit='us', error_is_null=True)
+    arr_time_arr = pc.strptime(arr_time_raw, format='%Y-%m-%d %H:%M', unit='us', error_is_null=True)
+
+    batch = pa.table({
+        'airline_iata': airline_iata_col,
+        'flight_iata': flight_iata_col,
+        'dep_iata': dep_iata_col,
+        'dep_icao': dep_icao_col,
+        'arr_iata': arr_iata_col,
+        'arr_icao': arr_icao_col,
+        'delayed': delayed_arr,
+        'flight_type': [flight_type] * len(flight_iata_col),
+        'dep_time': dep_time_arr,
+        'arr_time': arr_time_arr
+    }, schema=DELAYS_SCHEMA)
+
+    # Skip records with missing times silently and warn about unparseable ones
+    has_times = pc.and_(pc.is_valid(dep_time_arr), pc.is_valid(arr_time_arr))
+    times_given = pc.and_(
+        pc.greater(pc.utf8_length(dep_time_raw), 0),
+        pc.greater(pc.utf8_length(arr_time_raw), 0)
+    ).fill_null(False)
+    invalid = pc.and_(times_given, pc.invert(has_times))
+    if pc.any(invalid).as_py():
+        invalid_flights = batch.column('flight_iata').filter(invalid)
+        logger.warning(f"Invalid date format for flights {invalid_flights.to_pylist()}")
+
+    # Only keep records with a flight number, valid times and delayed >= min_delayed_time;
+    # an explicit null flight_iata would fail the primary key and abort the whole batch
+    keep = pc.and_(pc.is_valid(batch.column('flight_iata')), has_times)
+    batch = batch.filter(pc.and_(keep, pc.greater_equal(delayed_arr, min_delayed_time)))
+
+    if batch.num_rows == 0:
+        logger.info("No delay data available after processing.")
+        return None
+
+    return batch
+
+# Serializes ingest: concurrent batches update the same roll-up buckets and would conflict
+STORE_LOCK = threading.Lock()
+
+def store_delays(batch: pa.Table):
+    """
+    Upsert an Arrow batch of delay records into the delays table.
+    """
+    with STORE_LOCK, conn.cursor() as cur:
+        # Unconstrained staging table with the same columns, local to this cursor;
+        # the batch is loaded here in bulk and merged into delays with a single upsert
+        cur.execute('CREATE TEMP TABLE delays_stage AS SELECT * FROM delays LIMIT 0')
+
+        # Stage, upsert and roll-up maintenance commit together or not at all
+        cur.begin()
+        try:
+            # Bulk load the Arrow batch into the staging table, dropping duplicate keys;
+            # the registered view is temporary and scoped to this cursor
+            cur.register('delays_batch', batch)
             try:
-                dep_time_dt = datetime.strptime(dep_time_utc, '%Y-%m-%d %H:%M')
-                arr_time_dt = datetime.strptime(arr_time_utc, '%Y-%m-%d %H:%M')
-            except ValueError:
-                logger.warning(f"Invalid date format for flight {item.get('flight_iata')}")
-                continue
-
-            # Get the 'delayed' value
-            delayed = item.get('delayed', 0)
-            if not isinstance(delayed, int):
-                try:
-                    delayed = int(delayed)
-                except (ValueError, TypeError):
-                    delayed = 0
-
-            # Only process if delayed >= min_delayed_time
-            if delayed >= min_delayed_time:
-                dep_iata = item.get('dep_iata', '')
-                dep_icao = item.get('dep_icao', '')
-                arr_iata = item.get('arr_iata', '')
-                arr_icao = item.get('arr_icao', '')
-                records.append((
-                    item.get('airline_iata', ''),
-                    item.get('flight_iata', ''),
-                    dep_iata,
-                    dep_icao,
-                    arr_iata,
-                    arr_icao,
-                    delayed,
-                    flight_type,
-                    dep_time_dt,
-                    arr_time_dt
-                ))
-
-        if not records:
-            logger.info("No delay data available after processing.")
-            return
-
-        # Insert data into the database with conflict handling to prevent duplicates
-        cursor.executemany('''
-            INSERT INTO delays (
-                airline_iata, flight_iata, dep_iata, dep_icao,
-                arr_iata, arr_icao, delayed, flight_type, dep_time, arr_time
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT (flight_iata, dep_time, flight_type) DO UPDATE SET
-                airline_iata=excluded.airline_iata,
-                dep_iata=excluded.dep_iata,
-                dep_icao=excluded.dep_icao,
-                arr_iata=excluded.arr_iata,
-                arr_icao=excluded.arr_icao,
-                delayed=excluded.delayed,
-                arr_time=excluded.arr_time
-        ''', records)
-        conn.commit()
-
-        logger.info(f"{len(records)} records inserted/updated successfully.")
+                cur.execute('''
+                    INSERT INTO delays_stage
+                    SELECT DISTINCT ON (flight_iata, dep_time, flight_type) *
+                    FROM delays_batch
+                ''')
+            finally:
+                cur.unregister('delays_batch')
+
+            # Retract the roll-up contribution of the rows about to be replaced
+            cur.execute(ROLLUP_DELTA_SQL.format(sign='-', rows=REPLACED_ROWS))
+
+            # Upsert the staged batch with conflict handling to prevent duplicates
+            cur.execute('''
+                INSERT INTO delays
+                SELECT * FROM delays_stage
+                ON CONFLICT (flight_iata, dep_time, flight_type) DO UPDATE SET
+                    airline_iata=excluded.airline_iata,
+                    dep_iata=excluded.dep_iata,
+                    dep_icao=excluded.dep_icao,
+                    arr_iata=excluded.arr_iata,
+                    arr_icao=excluded.arr_icao,
+                    delayed=excluded.delayed,
+                    arr_time=excluded.arr_time
+            ''')
+
+            # Add the contribution of the new batch and drop emptied buckets
+            cur.execute(ROLLUP_DELTA_SQL.format(sign='', rows='delays_stage'))
+            cur.execute('DELETE FROM delays_rollup WHERE cnt = 0')
+        except Exception:
+            cur.rollback()
+            raise
+
+        # A failed commit aborts the transaction itself, so it is not rolled back above
+        cur.commit()
+
+    logger.info(f"{batch.num_rows} records inserted/updated successfully.")
+
+async def fetch_delays_batch(
+    flight_type: str,
+    min_delayed_time: int,
+    arrival_airport_code: Optional[str] = None,
+    departure_airport_code: Optional[str] = None
+) -> Optional[pa.Table]:
+    """
+    Fetch one direction of delay information from the Airlabs API and parse it into an Arrow batch.
+    """
+    params = build_delays_params(
+        flight_type, min_delayed_time, arrival_airport_code, departure_airport_code
+    )
+
+    # Make the API request
+    response = await http_client.get(AIRLABS_DELAYS_URL, params=params)
+
+    # JSON decoding and parsing run in a worker thread to keep the event loop free
+    return await asyncio.to_thread(parse_delays, response, flight_type, min_delayed_time)
+
+async def fetch_delays_task(
+    flight_type: str,
+    min_delayed_time: int,
+    arrival_airport_code: Optional[str] = None,
+    departure_airport_code: Optional[str] = None
+) -> bool:
+    """
+    Fetch delay information from the Airlabs API with specified filters and store it.
+    Returns True if the fetch was skipped because these filters were fetched recently.
+    """
+    try:
+        # Skip both the API call and the database write if these filters were just fetched
+        key = (flight_type, min_delayed_time, arrival_airport_code, departure_airport_code)
+        if key in RECENT_FETCHES:
+            logger.info("Delay data for these filters was fetched recently; skipping.")
+            return True
+
+        batch = await fetch_delays_batch(*key)
+        if batch is not None:
+            await asyncio.to_thread(store_delays, batch)
+
+        # API errors raise above, so they are retried on the next call rather than cached
+        RECENT_FETCHES[key] = True
 
     except Exception as e:
         logger.error("An error occurred during fetch_delays_task", exc_info=True)
 
-# Start the scheduler
-scheduler = BackgroundScheduler()
+    return False
 
-# Schedule the fetch_delays_task with default parameters
-scheduler.add_job(
-    fetch_delays_task,
-    'interval',
-    minutes=30,  # Adjust the interval as needed
-    kwargs={
-        'flight_type': 'departures',  # or 'arrivals'
-        'min_delayed_time': 30
-        # 'departure_airport_code': 'JFK',  # Optional
-        # 'arrival_airport_code': 'LAX'     # Optional
-    }
-)
+async def scheduled_fetch_task(
+    min_delayed_time: int,
+    arrival_airport_code: Optional[str] = None,
+    departure_airport_code: Optional[str] = None
+):
+    """
+    Scheduled task to fetch departures and arrivals concurrently and store them as a single batch.
+    """
+    try:
+        # Each direction fails on its own so one bad response does not discard the other
+        flight_types = ('departures', 'arrivals')
+        results = await asyncio.gather(*(
+            fetch_delays_batch(
+                flight_type, min_delayed_time, arrival_airport_code, departure_airport_code
+            )
+            for flight_type in flight_types
+        ), return_exceptions=True)
+
+        batches = []
+        for flight_type, result in zip(flight_types, results):
+            if isinstance(result, Exception):
+                logger.error(f"Scheduled fetch of {flight_type} failed", exc_info=result)
+            elif result is not None:
+                batches.append(result)
+
+        if batches:
+            await asyncio.to_thread(store_delays, pa.concat_tables(batches))
 
+    except Exception as e:
+        logger.error("An error occurred during scheduled_fetch_task", exc_info=True)
+
+# Scheduler running on the application's event loop
+scheduler = AsyncIOScheduler()
+
+# Schedule a combined departures and arrivals fetch with default parameters
 scheduler.add_job(
-    fetch_delays_task,
+    scheduled_fetch_task,
     'interval',
     minutes=30,  # Adjust the interval as needed
     kwargs={
-        'flight_type': 'arrivals',  # or 'arrivals'
         'min_delayed_time': 30
         # 'departure_airport_code': 'JFK',  # Optional
         # 'arrival_airport_code': 'LAX'     # Optional
     }
 )
 
-scheduler.start()
+# Start the scheduler once the event loop is running
+@app.on_event("startup")
+async def startup_event():
+    scheduler.start()
 
-# Ensure the scheduler is shut down when the app exits
+# Ensure the scheduler and HTTP client are shut down when the app exits
 @app.on_event("shutdown")
-def shutdown_event():
+async def shutdown_event():
     scheduler.shutdown()
+    await http_client.aclose()
+
+# In-flight /fetch_delays work keyed by its filters, shared by concurrent identical requests
+INFLIGHT: Dict[tuple, asyncio.Future] = {}
 
 @app.get('/fetch_delays', status_code=200)
-def fetch_delays(
+async def fetch_delays(
     flight_type: str = Query(..., pattern="^(arrivals|departures)$"),
     min_delayed_time: int = Query(..., ge=0),
-    arrival_airport_code: Optional[str] = Query(
-        None, min_length=3, max_length=3, pattern="^[A-Z]{3}$"
-    ),
-    departure_airport_code: Optional[str] = Query(
-        None, min_length=3, max_length=3, pattern="^[A-Z]{3}$"
-    )
+    arrival_airport_code: Optional[IATACode] = Query(None),
+    departure_airport_code: Optional[IATACode] = Query(None)
 ):
     """
     Fetch delay information from the Airlabs API with specified filters and store it in the database.
     """
     try:
-        fetch_delays_task(
-            flight_type=flight_type,
-            min_delayed_time=min_delayed_time,
-            arrival_airport_code=arrival_airport_code,
-            departure_airport_code=departure_airport_code
-        )
+        # Join an identical fetch that is already running instead of starting another
+        key = (flight_type, min_delayed_time, arrival_airport_code, departure_airport_code)
+        task = INFLIGHT.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch_delays_task(*key))
+            INFLIGHT[key] = task
+            task.add_done_callback(lambda _: INFLIGHT.pop(key, None))
+
+        # Shielded so one client disconnecting does not cancel the shared fetch
+        skipped = await asyncio.shield(task)
+        if skipped:
+            return {'status': 'success', 'message': 'Recently fetched; skipped.'}
         return {'status': 'success', 'message': 'Data fetched and stored successfully.'}
     except Exception as e:
         logger.error("An error occurred in /fetch_delays endpoint", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-from datetime import datetime, timezone
+@lru_cache(maxsize=None)
+def summary_query(use_rollup: bool, has_from: bool, has_to: bool) -> str:
+    """
+    Build the /summary UNION ALL query for one combination of source table and time bounds.
+    """
+    queries = []
+    for direction, (airport_column, time_column) in SUMMARY_COLUMNS.items():
+        if use_rollup:
+            where_conditions = ['airport_code = ?', f"direction = '{direction}'"]
+            time_column = 'bucket_hour'
+        else:
+            where_conditions = [f'{airport_column} = ?']
+        if has_from and has_to:
+            where_conditions.append(f'{time_column} BETWEEN ? AND ?')
+        elif has_from:
+            where_conditions.append(f'{time_column} >= ?')
+        elif has_to:
+            where_conditions.append(f'{time_column} <= ?')
+
+        where_clause = 'WHERE ' + ' AND '.join(where_conditions)
+
+        if use_rollup:
+            queries.append(f'''
+                SELECT '{direction}' AS arrival_departure, SUM(sum_delay) / SUM(cnt) AS average_delay,
+                       COALESCE(SUM(cnt), 0) AS total_flights
+                FROM delays_rollup
+                {where_clause}
+            ''')
+        else:
+            queries.append(f'''
+                SELECT '{direction}' AS arrival_departure, AVG(delayed) AS average_delay, COUNT(*) AS total_flights
+                FROM delays
+                {where_clause}
+            ''')
+
+    return ' UNION ALL '.join(queries)
+
+def parse_datetime_param(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse a 'YYYY-MM-DD HH:MM:SS' query parameter as a naive UTC datetime.
+
+    The delays and roll-up columns are naive UTC TIMESTAMPs; binding a tz-aware value
+    would make DuckDB shift it through the session TimeZone before comparing.
+    """
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
 
 @app.get('/summary', response_model=List[DelaySummary])
 def get_summary(
-    airport_code: Annotated[str, Query(min_length=3, max_length=3, pattern="^[A-Z]{3}$")],
+    airport_code: Annotated[IATACode, Query()],
     date_time_from: Optional[str] = Query(None),
     date_time_to: Optional[str] = Query(None)
 ):
@@ -247,78 +516,36 @@ def get_summary(
     Get the summary of delays for a specific airport within a time range.
     """
     try:
-        airport_code = airport_code.upper()
         summary = []
 
         # Parse date_time_from and date_time_to as UTC datetime objects
-        if date_time_from:
-            date_from = datetime.strptime(date_time_from, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
-        else:
-            date_from = None
-        if date_time_to:
-            date_to = datetime.strptime(date_time_to, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
-        else:
-            date_to = None
-
-        # Departures
-        dep_params = [airport_code]
-        dep_where_conditions = ['dep_iata = ?']
-        if date_from and date_to:
-            dep_where_conditions.append('dep_time BETWEEN ? AND ?')
-            dep_params.extend([date_from, date_to])
-        elif date_from:
-            dep_where_conditions.append('dep_time >= ?')
-            dep_params.append(date_from)
-        elif date_to:
-            dep_where_conditions.append('dep_time <= ?')
-            dep_params.append(date_to)
-
-        dep_where_clause = 'WHERE ' + ' AND '.join(dep_where_conditions)
-
-        dep_query = f'''
-            SELECT 'departures' AS arrival_departure, AVG(delayed) AS average_delay, COUNT(*) AS total_flights
-            FROM delays
-            {dep_where_clause}
-        '''
-        dep_result = cursor.execute(dep_query, dep_params).fetchone()
-
-        # Arrivals
-        arr_params = [airport_code]
-        arr_where_conditions = ['arr_iata = ?']
-        if date_from and date_to:
-            arr_where_conditions.append('arr_time BETWEEN ? AND ?')
-            arr_params.extend([date_from, date_to])
-        elif date_from:
-            arr_where_conditions.append('arr_time >= ?')
-            arr_params.append(date_from)
-        elif date_to:
-            arr_where_conditions.append('arr_time <= ?')
-            arr_params.append(date_to)
-
-        arr_where_clause = 'WHERE ' + ' AND '.join(arr_where_conditions)
-
-        arr_query = f'''
-            SELECT 'arrivals' AS arrival_departure, AVG(delayed) AS average_delay, COUNT(*) AS total_flights
-            FROM delays
-            {arr_where_clause}
-        '''
-        arr_result = cursor.execute(arr_query, arr_params).fetchone()
-
-        # Compile results
-        if dep_result and dep_result[2] > 0:
-            summary.append({
-                'airport_code': airport_code,
-                'arrival_departure': dep_result[0],
-                'average_delay': float(dep_result[1]),
-                'total_flights': dep_result[2]
-            })
-        if arr_result and arr_result[2] > 0:
-            summary.append({
-                'airport_code': airport_code,
-                'arrival_departure': arr_result[0],
-                'average_delay': float(arr_result[1]),
-                'total_flights': arr_result[2]
-            })
+        date_from = parse_datetime_param(date_time_from)
+        date_to = parse_datetime_param(date_time_to)
+
+        # Ranges made of whole hours are answered from the hourly roll-up,
+        # finer ranges fall back to scanning delays
+        use_rollup = (
+            (date_from is None or (date_from.minute == 0 and date_from.second == 0))
+            and (date_to is None or date_to.minute == 59)
+        )
+
+        # Bind the airport and time bounds to the cached query for this variant
+        time_params = [value for value in (date_from, date_to) if value is not None]
+        params = ([airport_code] + time_params) * len(SUMMARY_COLUMNS)
+        query = summary_query(use_rollup, date_from is not None, date_to is not None)
+        with conn.cursor() as cur:
+            results = {row[0]: row for row in cur.execute(query, params).fetchall()}
+
+        # Compile results, departures first
+        for direction in SUMMARY_COLUMNS:
+            result = results.get(direction)
+            if result and result[2] > 0:
+                summary.append({
+                    'airport_code': airport_code,
+                    'arrival_departure': result[0],
+                    'average_delay': float(result[1]),
+                    'total_flights': result[2]
+                })
 
         if not summary:
             raise HTTPException(status_code=404, detail="No data found for the specified parameters.")
@@ -334,34 +561,76 @@ def get_summary(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get('/delays')
-def get_all_delays():
+def get_all_delays(
+    limit: int = Query(1000, ge=1, le=10000),
+    offset: int = Query(0, ge=0),
+    flight_type: Optional[str] = Query(None, pattern="^(arrivals|departures)$"),
+    airport_code: Optional[IATACode] = Query(None),
+    date_time_from: Optional[str] = Query(None),
+    date_time_to: Optional[str] = Query(None),
+    orient: str = Query('records', pattern="^(records|columns)$")
+):
     """
-    Get all delay records.
+    Get a page of delay records, optionally filtered by flight type, airport and departure time.
+
+    With orient=columns the page is returned as one list per column instead of one object per row.
     """
     try:
-        result = cursor.execute('''
-            SELECT airline_iata, flight_iata, dep_iata, dep_icao,
-                   arr_iata, arr_icao, delayed, flight_type, dep_time, arr_time
-            FROM delays
-        ''').fetchall()
-
-        # Convert to list of dictionaries
-        delays = [
-            {
-                'airline_iata': row[0],
-                'flight_iata': row[1],
-                'dep_iata': row[2],
-                'dep_icao': row[3],
-                'arr_iata': row[4],
-                'arr_icao': row[5],
-                'delayed': row[6],
-                'flight_type': row[7],
-                'dep_time': row[8].isoformat(),
-                'arr_time': row[9].isoformat()
-            }
-            for row in result
-        ]
-        return delays
+        date_from = parse_datetime_param(date_time_from)
+        date_to = parse_datetime_param(date_time_to)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use 'YYYY-MM-DD HH:MM:SS'.")
+
+    params = []
+    where_conditions = []
+    if flight_type:
+        where_conditions.append('flight_type = ?')
+        params.append(flight_type)
+    if airport_code:
+        where_conditions.append('(dep_iata = ? OR arr_iata = ?)')
+        params.extend([airport_code, airport_code])
+    if date_from:
+        where_conditions.append('dep_time >= ?')
+        params.append(date_from)
+    if date_to:
+        where_conditions.append('dep_time <= ?')
+        params.append(date_to)
+
+    where_clause = 'WHERE ' + ' AND '.join(where_conditions) if where_conditions else ''
+    params.extend([limit, offset])
+    query = f'''
+        SELECT airline_iata, flight_iata, dep_iata, dep_icao,
+               arr_iata, arr_icao, delayed, flight_type, dep_time, arr_time
+        FROM delays
+        {where_clause}
+        ORDER BY dep_time, flight_iata, flight_type
+        LIMIT ? OFFSET ?
+    '''
+
+    try:
+        with conn.cursor() as cur:
+            if orient == 'columns':
+                # Export the page as Arrow columns: no per-row dicts or repeated keys,
+                # although every cell still becomes a Python object
+                return ORJSONResponse(cur.execute(query, params).arrow().to_pydict())
+
+            # DuckDB renders the page as one JSON array, so no per-row Python objects are built
+            records = cur.execute(f'''
+                SELECT COALESCE(json_group_array(json_object(
+                    'airline_iata', airline_iata,
+                    'flight_iata', flight_iata,
+                    'dep_iata', dep_iata,
+                    'dep_icao', dep_icao,
+                    'arr_iata', arr_iata,
+                    'arr_icao', arr_icao,
+                    'delayed', delayed,
+                    'flight_type', flight_type,
+                    'dep_time', strftime(dep_time, '%Y-%m-%dT%H:%M:%S'),
+                    'arr_time', strftime(arr_time, '%Y-%m-%dT%H:%M:%S')
+                ) ORDER BY dep_time, flight_iata, flight_type), '[]')
+                FROM ({query})
+            ''', params).fetchone()[0]
+        return Response(content=records, media_type='application/json')
 
     except Exception as e:
         logger.error("An error occurred in /delays endpoint", exc_info=True)